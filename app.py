@@ -8,10 +8,317 @@ import streamlit as st
 import pandas as pd
 import calendar
 from datetime import datetime, date
-import plotly.express as px
-import plotly.graph_objects as go
+import altair as alt
 from scheduler import ShiftScheduler
 
+# Show datetime64 'Data' columns as plain dates
+DATE_COLUMN_CONFIG = {'Data': st.column_config.DateColumn(format='YYYY-MM-DD')}
+
+# Static sidebar reference text, defined once at import
+SHIFT_INFO_MARKDOWN = """
+**Dias Úteis (Seg-Sáb):**
+- 7h-16h (Manhã)
+- 15h-00h (Tarde)
+- 00h-08h (Noite)
+- 9h-21h (Estendido)
+
+**Domingos:**
+- 7h-16h (Manhã)
+- 15h-00h (Tarde)
+- 00h-08h (Noite)
+"""
+
+DETAILS_MARKDOWN = """
+### 📊 Restrições
+- **Cobertura por Turno**: 1 trabalhador por turno
+- **Cobertura por Dia**:
+  - Dias úteis: 4 turnos (3 normais + 1 estendido) = 4 trabalhadores
+  - Domingos: 3 turnos (3 normais) = 3 trabalhadores
+- **Padrão de Trabalho**: **OBRIGATÓRIO** - 4 dias consecutivos, depois 2 dias de folga
+- **Consistência de Turno**: **OBRIGATÓRIA** - Trabalhadores mantêm o mesmo turno durante o período de trabalho até folgarem (depois podem mudar de turno)
+- **Restrições**: Sem semana completa de folga
+
+## 🎯 Soluções Recomendadas
+
+### Solução A: Configuração Mínima
+- ✅ **4 trabalhadores, 1 por turno, 1-7 dias/semana** (mínimo viável com consistência)
+- ⚠️ **5+ trabalhadores**: Pode não funcionar com consistência obrigatória
+
+### Solução B: Configuração Flexível
+- ✅ **4 trabalhadores, 1 por turno, 1-7 dias/semana** (recomendado)
+- 💡 **Nota**: Com consistência obrigatória, 4 trabalhadores é o ideal
+
+### Solução C: Configuração Alternativa
+- 🔧 **Para mais trabalhadores**: Considere desativar o padrão estrito 4+2 dias
+- 🔧 **Para maior flexibilidade**: Ajuste os dias de trabalho por semana
+
+## 🎛️ Recomendações da Interface Streamlit
+
+A interface atual permite-lhe experimentar com estes parâmetros:
+- **Use 4 trabalhadores, 1 por turno** para sucesso garantido com consistência
+- **Para mais trabalhadores**: Pode ser necessário relaxar restrições
+- **Ajuste os dias de trabalho para 1-7** para máxima flexibilidade
+- **Use meses diferentes** para encontrar um melhor alinhamento
+
+> ⚠️ **Nota Importante**: O padrão de 4 dias de trabalho/2 dias de folga é a restrição mais rigorosa e a principal razão para a inviabilidade em cenários de menor força de trabalho.
+"""
+
+
+# calendar.month_name formats on every lookup; resolve the names once
+_MONTH_NAMES = tuple(calendar.month_name)
+_MONTHS = tuple(range(1, 13))
+_YEARS = tuple(range(2024, 2030))
+
+
+def _fmt_month(month):
+    """Month selector label"""
+    return _MONTH_NAMES[month]
+
+
+@st.cache_resource(max_entries=8)
+def _get_scheduler(num_workers, workers_per_shift, min_working_days, max_working_days, strict_pattern, max_time_s):
+    """Shared scheduler instance per parameter combination"""
+    return ShiftScheduler(
+        num_workers=num_workers,
+        workers_per_shift=workers_per_shift,
+        min_working_days=min_working_days,
+        max_working_days=max_working_days,
+        strict_pattern=strict_pattern,
+        max_time_s=max_time_s
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _solve_cached(year, month, num_workers, workers_per_shift, min_working_days, max_working_days, strict_pattern,
+                  max_time_s, _warm_hint=None):
+    """Solve the schedule once per parameter combination and reuse the result
+    
+    Timeouts propagate as TimeoutError, so only definitive outcomes are cached.
+    """
+    scheduler = _get_scheduler(
+        num_workers, workers_per_shift, min_working_days, max_working_days, strict_pattern, max_time_s
+    )
+    return scheduler.solve_schedule(year, month, warm_hint=_warm_hint)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _build_views(result_key, _scheduler, _result):
+    """Cached views of a solved schedule, built in one pass and keyed by its solve parameters"""
+    views = _scheduler.build_all_views(_result)
+    
+    schedule_df = views.schedule_df
+    if not schedule_df.empty:
+        schedule_df['Data'] = pd.to_datetime(schedule_df['Data'])
+        schedule_df['Dia'] = schedule_df['Dia'].astype('category')
+        schedule_df['Turno'] = schedule_df['Turno'].astype('category')
+    
+    worker_df = views.worker_df
+    if not worker_df.empty:
+        worker_df['Data'] = pd.to_datetime(worker_df['Data'])
+        for column in ('Trabalhador', 'Dia', 'Turno', 'Estado'):
+            worker_df[column] = worker_df[column].astype('category')
+    
+    shift_coverage = views.shift_coverage
+    if not shift_coverage.empty:
+        shift_coverage['Cobertura %'] = (shift_coverage['Total Trabalhadores'] / (shift_coverage['Dias'] * 2) * 100).round(1)
+    
+    return views
+
+
+def _schedule_metrics(schedule_df):
+    """Summary counts for the calendar view: (days, assigned shifts, coverage %)"""
+    if schedule_df.empty:
+        return 0, 0, 0.0
+    counts = schedule_df['Contagem']
+    n_days = schedule_df['Data'].nunique()
+    n_assigned = int((counts > 0).sum())
+    n_full = int((counts == 2).sum())
+    return n_days, n_assigned, 100.0 * n_full / max(n_assigned, 1)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _to_csv_bytes(df_key, _df):
+    """Cached UTF-8 CSV export of a schedule view"""
+    return _df.to_csv(index=False).encode('utf-8')
+
+
+def _worker_pattern_chart(worker_data, worker_name):
+    """Bar chart of a worker's working and rest days"""
+    return alt.Chart(
+        worker_data[['Data', 'Estado']],
+        title=f"Padrão de Horário - {worker_name}"
+    ).mark_bar().encode(
+        x=alt.X('yearmonthdate(Data):O', title='Data', axis=alt.Axis(labelAngle=45)),
+        y=alt.Y('Estado:N'),
+        color=alt.Color(
+            'Estado:N',
+            scale=alt.Scale(domain=['Trabalho', 'Folga'], range=['#2E8B57', '#DC143C'])
+        )
+    )
+
+
+@st.fragment
+def _worker_tab(worker_df, num_workers):
+    """Tab 2 body; reruns on its own when the worker selector changes"""
+    st.subheader("👥 Horário por Trabalhador")
+    
+    if not worker_df.empty:
+        # Create worker selector
+        selected_worker = st.selectbox(
+            "Selecionar Trabalhador para Ver",
+            options=[f"Trabalhador {i+1}" for i in range(num_workers)],
+            key="worker_selector"
+        )
+        
+        # Look up the precomputed rows for the selected worker
+        worker_data = st.session_state.worker_groups[selected_worker]
+        
+        # Display worker schedule
+        st.dataframe(worker_data, column_config=DATE_COLUMN_CONFIG, use_container_width=True)
+        
+        # Worker statistics
+        working_days = len(worker_data[worker_data['Estado'] == 'Trabalho'])
+        off_days = len(worker_data[worker_data['Estado'] == 'Folga'])
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Dias de Trabalho", working_days)
+        with col2:
+            st.metric("Dias de Folga", off_days)
+        
+        # Visualize worker pattern, building each worker's chart once per solve
+        worker_charts = st.session_state.setdefault('worker_charts', {})
+        if selected_worker not in worker_charts:
+            worker_charts[selected_worker] = _worker_pattern_chart(worker_data, selected_worker)
+        st.altair_chart(worker_charts[selected_worker], use_container_width=True)
+    else:
+        st.warning("Nenhum dado de horário de trabalhador disponível")
+
+
+@st.fragment
+def _calendar_tab(schedule_df):
+    """Tab 1 body; reruns on its own"""
+    st.subheader("📅 Horário por Dia e Turno")
+    
+    if not schedule_df.empty:
+        # Filter out unassigned shifts
+        assigned_df = schedule_df[schedule_df['Contagem'] > 0]
+        
+        # Native Arrow rendering; no Styler HTML to serialize
+        st.dataframe(
+            assigned_df,
+            column_config={
+                **DATE_COLUMN_CONFIG,
+                'Turno': st.column_config.TextColumn()
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        
+        # Summary statistics
+        n_days, n_assigned, coverage = st.session_state.schedule_metrics
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Total de Dias", n_days)
+        with col2:
+            st.metric("Total de Turnos", n_assigned)
+        with col3:
+            st.metric("Cobertura %", f"{coverage:.1f}%")
+    else:
+        st.warning("Nenhum dado de horário disponível")
+
+
+@st.fragment
+def _coverage_tab(schedule_df, scheduler, result):
+    """Tab 3 body; reruns on its own"""
+    st.subheader("📊 Análise de Cobertura")
+    
+    if not schedule_df.empty:
+        # Plotly is only needed once there is a schedule to chart
+        import plotly.graph_objects as go
+        
+        # Shift coverage analysis
+        shift_coverage = st.session_state.shift_coverage
+        
+        st.subheader("Resumo da Cobertura de Turnos")
+        st.dataframe(shift_coverage, use_container_width=True)
+        
+        # Visualize coverage, passing the precomputed columns straight to the traces
+        coverage_pct = shift_coverage['Cobertura %'].to_numpy()
+        fig = go.Figure(go.Bar(
+            x=shift_coverage['Turno'].to_numpy(),
+            y=coverage_pct,
+            marker=dict(color=coverage_pct, colorscale='RdYlGn', colorbar=dict(title='Cobertura %'))
+        ))
+        fig.update_layout(
+            title='Percentagem de Cobertura por Turno',
+            xaxis_title='Turno',
+            yaxis_title='Cobertura %'
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Daily coverage heatmap
+        fig = go.Figure(go.Heatmap(
+            z=st.session_state.daily_coverage.T,
+            x=result['days'],
+            y=list(scheduler.shifts.values()),
+            zmin=0,
+            zmax=scheduler.workers_per_shift,
+            colorscale='RdYlGn'
+        ))
+        fig.update_layout(
+            title='Mapa de Calor - Cobertura Diária de Turnos',
+            xaxis_title='Data',
+            yaxis_title='Turno'
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.warning("Nenhum dado de cobertura disponível")
+
+
+@st.fragment
+def _export_tab(schedule_df, worker_df, year, month):
+    """Tab 4 body; download clicks rerun only this tab"""
+    st.subheader("📁 Exportar Horário")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("**📅 Horário Diário (CSV)**")
+        st.download_button(
+            label="Descarregar Horário Diário",
+            data=st.session_state.csv_schedule,
+            file_name=f"horario_{year}_{month:02d}.csv",
+            mime="text/csv"
+        )
+    
+    with col2:
+        st.markdown("**👥 Horário dos Trabalhadores (CSV)**")
+        st.download_button(
+            label="Descarregar Horário dos Trabalhadores",
+            data=st.session_state.csv_workers,
+            file_name=f"trabalhadores_{year}_{month:02d}.csv",
+            mime="text/csv"
+        )
+    
+    # Display preview of data to export
+    st.markdown("**Pré-visualização dos Dados para Exportar:**")
+    preview_tab1, preview_tab2 = st.tabs(["Horário Diário", "Horário dos Trabalhadores"])
+    
+    with preview_tab1:
+        st.dataframe(schedule_df.head(10), column_config=DATE_COLUMN_CONFIG, use_container_width=True)
+    
+    with preview_tab2:
+        st.dataframe(worker_df.head(10), column_config=DATE_COLUMN_CONFIG, use_container_width=True)
+
+
+def _clear_schedule():
+    """Drop the stored schedule and its derived views from the session"""
+    for key in ('result_key', 'schedule_result', 'scheduler', 'schedule_df', 'worker_df',
+                'shift_coverage', 'daily_coverage', 'worker_groups', 'worker_charts', 'schedule_metrics',
+                'csv_schedule', 'csv_workers'):
+        st.session_state.pop(key, None)
+
 
 def main():
     st.set_page_config(
@@ -34,14 +341,14 @@ def main():
         with col1:
             month = st.selectbox(
                 "Mês",
-                options=list(range(1, 13)),
-                format_func=lambda x: calendar.month_name[x],
+                options=_MONTHS,
+                format_func=_fmt_month,
                 index=datetime.now().month - 1
             )
         with col2:
             year = st.selectbox(
                 "Ano",
-                options=list(range(2024, 2030)),
+                options=_YEARS,
                 index=0
             )
         
@@ -99,6 +406,15 @@ def main():
         else:
             st.success("✅ **Padrão 4+2 Obrigatório**: Trabalhadores trabalham 4 dias consecutivos seguidos de 2 dias de folga.")
         
+        # Upper bound on solver time; the best feasible schedule found is used
+        solver_time_limit_s = st.slider(
+            "Tempo máximo de solver (s)",
+            min_value=5,
+            max_value=120,
+            value=30,
+            help="Tempo máximo de procura do OR-Tools antes de devolver o melhor horário encontrado"
+        )
+        
         # Check for problematic configurations
         if num_workers < 4:
             st.error("⚠️ **Configuração Insuficiente**: São necessários pelo menos 4 trabalhadores.")
@@ -115,239 +431,71 @@ def main():
         # Display shift information
         st.markdown("---")
         st.markdown("### 📋 Informação dos Turnos")
-        st.markdown("""
-        **Dias Úteis (Seg-Sáb):**
-        - 7h-16h (Manhã)
-        - 15h-00h (Tarde)
-        - 00h-08h (Noite)
-        - 9h-21h (Estendido)
-        
-        **Domingos:**
-        - 7h-16h (Manhã)
-        - 15h-00h (Tarde)
-        - 00h-08h (Noite)
-        """)
+        st.markdown(SHIFT_INFO_MARKDOWN)
         
-        st.markdown("### 📊 Restrições")
-        st.markdown("""
-        - **Cobertura por Turno**: 1 trabalhador por turno
-        - **Cobertura por Dia**:
-          - Dias úteis: 4 turnos (3 normais + 1 estendido) = 4 trabalhadores
-          - Domingos: 3 turnos (3 normais) = 3 trabalhadores
-        - **Padrão de Trabalho**: **OBRIGATÓRIO** - 4 dias consecutivos, depois 2 dias de folga
-        - **Consistência de Turno**: **OBRIGATÓRIA** - Trabalhadores mantêm o mesmo turno durante o período de trabalho até folgarem (depois podem mudar de turno)
-        - **Restrições**: Sem semana completa de folga
-        """)
-        
-        st.markdown("""
-        ## 🎯 Soluções Recomendadas
-        
-        ### Solução A: Configuração Mínima
-        - ✅ **4 trabalhadores, 1 por turno, 1-7 dias/semana** (mínimo viável com consistência)
-        - ⚠️ **5+ trabalhadores**: Pode não funcionar com consistência obrigatória
-        
-        ### Solução B: Configuração Flexível
-        - ✅ **4 trabalhadores, 1 por turno, 1-7 dias/semana** (recomendado)
-        - 💡 **Nota**: Com consistência obrigatória, 4 trabalhadores é o ideal
-        
-        ### Solução C: Configuração Alternativa
-        - 🔧 **Para mais trabalhadores**: Considere desativar o padrão estrito 4+2 dias
-        - 🔧 **Para maior flexibilidade**: Ajuste os dias de trabalho por semana
-        
-        ## 🎛️ Recomendações da Interface Streamlit
-        
-        A interface atual permite-lhe experimentar com estes parâmetros:
-        - **Use 4 trabalhadores, 1 por turno** para sucesso garantido com consistência
-        - **Para mais trabalhadores**: Pode ser necessário relaxar restrições
-        - **Ajuste os dias de trabalho para 1-7** para máxima flexibilidade
-        - **Use meses diferentes** para encontrar um melhor alinhamento
-        
-        > ⚠️ **Nota Importante**: O padrão de 4 dias de trabalho/2 dias de folga é a restrição mais rigorosa e a principal razão para a inviabilidade em cenários de menor força de trabalho.
-        """)
+        # Constraints and recommendations stay collapsed until requested
+        with st.expander("Detalhes", expanded=False):
+            st.markdown(DETAILS_MARKDOWN)
     
     # Main content area
+    result_key = (
+        year, month, num_workers, workers_per_shift,
+        min_working_days, max_working_days, strict_pattern, solver_time_limit_s
+    )
+    
     if generate_btn:
-        # Create scheduler with current parameters
-        scheduler = ShiftScheduler(
-            num_workers=num_workers,
-            workers_per_shift=workers_per_shift,
-            min_working_days=min_working_days,
-            max_working_days=max_working_days,
-            strict_pattern=strict_pattern
-        )
+        # Reuse the scheduler for the current parameters
+        scheduler = _get_scheduler(*result_key[2:])
         
+        # Warm-start from the last schedule solved with the same parameters
+        warm_hint = None
+        last_solved = st.session_state.get('last_solved')
+        if last_solved and last_solved[0] == result_key[2:]:
+            warm_hint = last_solved[1]
+        
+        timed_out = False
         with st.spinner("A gerar horário... Isto pode demorar alguns momentos."):
-            result = scheduler.solve_schedule(year, month)
+            try:
+                result = _solve_cached(*result_key, _warm_hint=warm_hint)
+            except TimeoutError:
+                result, timed_out = None, True
         
-        if result:
-            st.success(f"✅ Horário gerado com sucesso para {calendar.month_name[month]} {year}")
+        if timed_out:
+            _clear_schedule()
+            st.error(
+                f"⏱️ O solver atingiu o limite de {solver_time_limit_s} s sem encontrar um horário. "
+                "Aumente o tempo máximo de solver ou tente novamente."
+            )
+        elif result:
+            st.success(f"✅ Horário gerado com sucesso para {_fmt_month(month)} {year}")
             
-            # Store result in session state
+            # Store result in session state, replacing any previous schedule
+            _clear_schedule()
+            st.session_state.result_key = result_key
             st.session_state.schedule_result = result
             st.session_state.scheduler = scheduler
+            st.session_state.last_solved = (result_key[2:], result)
             
-            # Create tabs for different views
-            tab1, tab2, tab3, tab4 = st.tabs(["📅 Vista do Calendário", "👥 Vista dos Trabalhadores", "📊 Análise de Cobertura", "📁 Exportar"])
-            
-            with tab1:
-                st.subheader("📅 Horário por Dia e Turno")
-                schedule_df = scheduler.format_schedule(result)
-                
-                if not schedule_df.empty:
-                    # Filter out unassigned shifts
-                    assigned_df = schedule_df[schedule_df['Contagem'] > 0].copy()
-                    
-                    # Color code the shifts
-                    def color_shift(val):
-                        colors = {
-                            '7h-16h': 'background-color: #e8f5e8',    # Light green
-                            '15h-00h': 'background-color: #fff3cd',  # Light yellow
-                            '00h-08h': 'background-color: #d1ecf1',  # Light blue
-                            '9h-21h': 'background-color: #f8d7da'   # Light red
-                        }
-                        return colors.get(val, '')
-                    
-                    # Apply styling
-                    styled_df = assigned_df.style.applymap(color_shift, subset=['Turno'])
-                    st.dataframe(styled_df, use_container_width=True)
-                    
-                    # Summary statistics
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Total de Dias", len(schedule_df['Data'].unique()))
-                    with col2:
-                        st.metric("Total de Turnos", len(assigned_df))
-                    with col3:
-                        coverage = len(assigned_df[assigned_df['Contagem'] == 2]) / len(assigned_df) * 100
-                        st.metric("Cobertura %", f"{coverage:.1f}%")
-                else:
-                    st.warning("Nenhum dado de horário disponível")
-            
-            with tab2:
-                st.subheader("👥 Horário por Trabalhador")
-                worker_df = scheduler.get_worker_schedule(result)
-                
-                if not worker_df.empty:
-                    # Create worker selector
-                    selected_worker = st.selectbox(
-                        "Selecionar Trabalhador para Ver",
-                        options=[f"Trabalhador {i+1}" for i in range(scheduler.num_workers)],
-                        key="worker_selector"
-                    )
-                    
-                    # Filter data for selected worker
-                    worker_data = worker_df[worker_df['Trabalhador'] == selected_worker]
-                    
-                    # Display worker schedule
-                    st.dataframe(worker_data, use_container_width=True)
-                    
-                    # Worker statistics
-                    working_days = len(worker_data[worker_data['Estado'] == 'Trabalho'])
-                    off_days = len(worker_data[worker_data['Estado'] == 'Folga'])
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.metric("Dias de Trabalho", working_days)
-                    with col2:
-                        st.metric("Dias de Folga", off_days)
-                    
-                    # Visualize worker pattern
-                    fig = px.bar(
-                        worker_data, 
-                        x='Data', 
-                        y='Estado',
-                        color='Estado',
-                        title=f"Padrão de Horário - {selected_worker}",
-                        color_discrete_map={'Trabalho': '#2E8B57', 'Folga': '#DC143C'}
-                    )
-                    fig.update_layout(xaxis_tickangle=45)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.warning("Nenhum dado de horário de trabalhador disponível")
+            # Build every view in one pass and share them across all tabs and reruns
+            views = _build_views(result_key, scheduler, result)
+            st.session_state.schedule_df = views.schedule_df
+            st.session_state.worker_df = views.worker_df
+            st.session_state.shift_coverage = views.shift_coverage
+            st.session_state.daily_coverage = views.daily_coverage
+            st.session_state.worker_groups = dict(tuple(
+                st.session_state.worker_df.groupby('Trabalhador', observed=True)
+            ))
+            st.session_state.schedule_metrics = _schedule_metrics(st.session_state.schedule_df)
             
-            with tab3:
-                st.subheader("📊 Análise de Cobertura")
-                
-                if 'schedule_result' in st.session_state:
-                    schedule_df = scheduler.format_schedule(result)
-                    
-                    if not schedule_df.empty:
-                        # Shift coverage analysis
-                        shift_coverage = schedule_df.groupby('Turno')['Contagem'].agg(['sum', 'mean', 'count']).reset_index()
-                        shift_coverage.columns = ['Turno', 'Total Trabalhadores', 'Média Trabalhadores', 'Dias']
-                        shift_coverage['Cobertura %'] = (shift_coverage['Total Trabalhadores'] / (shift_coverage['Dias'] * 2) * 100).round(1)
-                        
-                        st.subheader("Resumo da Cobertura de Turnos")
-                        st.dataframe(shift_coverage, use_container_width=True)
-                        
-                        # Visualize coverage
-                        fig = px.bar(
-                            shift_coverage,
-                            x='Turno',
-                            y='Cobertura %',
-                            title='Percentagem de Cobertura por Turno',
-                            color='Cobertura %',
-                            color_continuous_scale='RdYlGn'
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Daily coverage heatmap
-                        daily_coverage = schedule_df.pivot_table(
-                            index='Data', 
-                            columns='Turno', 
-                            values='Contagem', 
-                            fill_value=0
-                        )
-                        
-                        fig = px.imshow(
-                            daily_coverage.T,
-                            title='Mapa de Calor - Cobertura Diária de Turnos',
-                            color_continuous_scale='RdYlGn',
-                            aspect='auto'
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.warning("Nenhum dado de cobertura disponível")
-            
-            with tab4:
-                st.subheader("📁 Exportar Horário")
-                
-                if 'schedule_result' in st.session_state:
-                    schedule_df = scheduler.format_schedule(result)
-                    worker_df = scheduler.get_worker_schedule(result)
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**📅 Horário Diário (CSV)**")
-                        csv_schedule = schedule_df.to_csv(index=False)
-                        st.download_button(
-                            label="Descarregar Horário Diário",
-                            data=csv_schedule,
-                            file_name=f"horario_{year}_{month:02d}.csv",
-                            mime="text/csv"
-                        )
-                    
-                    with col2:
-                        st.markdown("**👥 Horário dos Trabalhadores (CSV)**")
-                        csv_workers = worker_df.to_csv(index=False)
-                        st.download_button(
-                            label="Descarregar Horário dos Trabalhadores",
-                            data=csv_workers,
-                            file_name=f"trabalhadores_{year}_{month:02d}.csv",
-                            mime="text/csv"
-                        )
-                    
-                    # Display preview of data to export
-                    st.markdown("**Pré-visualização dos Dados para Exportar:**")
-                    preview_tab1, preview_tab2 = st.tabs(["Horário Diário", "Horário dos Trabalhadores"])
-                    
-                    with preview_tab1:
-                        st.dataframe(schedule_df.head(10), use_container_width=True)
-                    
-                    with preview_tab2:
-                        st.dataframe(worker_df.head(10), use_container_width=True)
+            # Serialize the exports once per solve
+            st.session_state.csv_schedule = _to_csv_bytes(
+                (result_key, 'schedule'), st.session_state.schedule_df
+            )
+            st.session_state.csv_workers = _to_csv_bytes(
+                (result_key, 'workers'), st.session_state.worker_df
+            )
         else:
+            _clear_schedule()
             st.error("❌ Impossível gerar um horário viável. As restrições podem ser demasiado restritivas para este mês.")
             st.markdown("""
             **Soluções possíveis:**
@@ -355,6 +503,30 @@ def main():
             - O padrão de 4 dias de trabalho/2 dias de folga pode não se alinhar bem com o calendário deste mês
             - Considere ajustar as restrições se necessário
             """)
+    elif st.session_state.get('result_key') != result_key:
+        # Parameters changed since the last solve, so the stored schedule is stale
+        _clear_schedule()
+    
+    if 'schedule_result' in st.session_state:
+        scheduler = st.session_state.scheduler
+        result = st.session_state.schedule_result
+        schedule_df = st.session_state.schedule_df
+        worker_df = st.session_state.worker_df
+        
+        # Create tabs for different views
+        tab1, tab2, tab3, tab4 = st.tabs(["📅 Vista do Calendário", "👥 Vista dos Trabalhadores", "📊 Análise de Cobertura", "📁 Exportar"])
+        
+        with tab1:
+            _calendar_tab(schedule_df)
+        
+        with tab2:
+            _worker_tab(worker_df, scheduler.num_workers)
+        
+        with tab3:
+            _coverage_tab(schedule_df, scheduler, result)
+        
+        with tab4:
+            _export_tab(schedule_df, worker_df, year, month)
     
     # Display instructions if no schedule generated yet
     if 'schedule_result' not in st.session_state:
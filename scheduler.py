@@ -10,19 +10,42 @@ Generates monthly shift schedules for 5 workers with the following constraints:
 
 from ortools.sat.python import cp_model
 import calendar
-from datetime import datetime, timedelta
+import functools
+import os
+from datetime import date
+from types import SimpleNamespace
 from typing import List, Dict, Tuple, Optional
+import numpy as np
 import pandas as pd
 
 
+# Weekday names indexed by date.weekday(), resolved once instead of strftime('%A') per day
+_DAY_NAMES = tuple(calendar.day_name)
+
+
+@functools.lru_cache(maxsize=32)
+def _month_days(year: int, month: int) -> Tuple[date, ...]:
+    """All days in a given month, built once per (year, month)"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    return tuple(date(year, month, day) for day in range(1, days_in_month + 1))
+
+
 class ShiftScheduler:
-    def __init__(self, num_workers=5, workers_per_shift=2, min_working_days=3, max_working_days=5, strict_pattern=True):
+    def __init__(self, num_workers=5, workers_per_shift=2, min_working_days=3, max_working_days=5, strict_pattern=True,
+                 max_time_s=30.0, solver_workers=None):
         self.num_workers = num_workers
         self.workers = list(range(self.num_workers))
         self.workers_per_shift = workers_per_shift
         self.min_working_days = min_working_days
         self.max_working_days = max_working_days
         self.strict_pattern = strict_pattern
+        self.max_time_s = max_time_s
+        # CP-SAT search workers (threads); None uses every available CPU
+        self.solver_workers = solver_workers or os.cpu_count() or 1
+        
+        # Built models keyed by (days in month, weekday of the 1st); months sharing both
+        # have identical constraint structure
+        self._models = {}
         
         # Shift definitions
         self.shifts = {
@@ -35,234 +58,272 @@ class ShiftScheduler:
         # Sunday shifts (only 0, 1, 2)
         self.sunday_shifts = [0, 1, 2]
         
-    def get_month_days(self, year: int, month: int) -> List[datetime]:
+    def get_month_days(self, year: int, month: int) -> List[date]:
         """Get all days in a given month"""
-        days_in_month = calendar.monthrange(year, month)[1]
-        return [datetime(year, month, day) for day in range(1, days_in_month + 1)]
+        return list(_month_days(year, month))
     
-    def is_sunday(self, date: datetime) -> bool:
+    def is_sunday(self, date: date) -> bool:
         """Check if a date is Sunday"""
-        return date.weekday() == 6  # Sunday is 6 in Python datetime
+        return date.weekday() == 6  # Sunday is 6 in Python date.weekday()
     
-    def get_available_shifts(self, date: datetime) -> List[int]:
+    def get_available_shifts(self, date: date) -> List[int]:
         """Get available shifts for a given date"""
         if self.is_sunday(date):
             return self.sunday_shifts
         return list(self.shifts.keys())
     
-    def create_schedule_model(self, year: int, month: int) -> Tuple[cp_model.CpModel, Dict]:
-        """Create OR-Tools model for the given month"""
+    def get_sunday_mask(self, days: List[date]) -> np.ndarray:
+        """Boolean mask of the Sundays in a list of days"""
+        return np.array([date.weekday() for date in days]) == 6
+    
+    def create_schedule_model(self, year: int, month: int) -> Tuple[cp_model.CpModel, np.ndarray, List[date]]:
+        """Create OR-Tools model for the given month, returning the model, its variables and the days"""
         model = cp_model.CpModel()
         
-        # Get all days in the month
+        # Get all days in the month and the shifts available on each, computed once
         days = self.get_month_days(year, month)
         num_days = len(days)
+        weekday_shifts, sunday_shifts = tuple(self.shifts), tuple(self.sunday_shifts)
+        avail = [sunday_shifts if is_sunday else weekday_shifts for is_sunday in self.get_sunday_mask(days)]
         
-        # Decision variables: shifts[worker][day][shift] = 1 if worker works shift on day
-        shifts = {}
+        # Decision variables: shifts[worker, day, shift] = 1 if worker works shift on day
+        # (None where the shift is not offered that day, i.e. shift 3 on Sundays)
+        # Constraint 4: Workers maintain same shift type during their working period until they rest
+        # This applies regardless of strict_pattern setting. A shift offered on consecutive days
+        # is worked on all of them or none, so each such run of days shares a single variable.
+        shifts = np.full((self.num_workers, num_days, len(self.shifts)), None, dtype=object)
+        new_bool_var = model.NewBoolVar
+        offered = [[shift in available_shifts for available_shifts in avail] for shift in self.shifts]
         for worker in self.workers:
-            shifts[worker] = {}
-            for day in range(num_days):
-                shifts[worker][day] = {}
-                available_shifts = self.get_available_shifts(days[day])
-                for shift in available_shifts:
-                    shifts[worker][day][shift] = model.NewBoolVar(f'worker_{worker}_day_{day}_shift_{shift}')
+            for shift, offered_on in zip(self.shifts, offered):
+                var = None
+                for day, is_offered in enumerate(offered_on):
+                    if not is_offered:
+                        var = None
+                    else:
+                        if var is None:
+                            var = new_bool_var(f'worker_{worker}_shift_{shift}_from_day_{day}')
+                        shifts[worker, day, shift] = var
+        
+        # Constraints 1, 2 and 5 are plain literal lists, so they are written straight into the
+        # model proto by variable index instead of going through the per-call Python wrappers
+        var_index = [[[shifts[worker, day, shift].Index() for shift in avail[day]]
+                      for day in range(num_days)]
+                     for worker in self.workers]
+        constraints = model.Proto().constraints
         
         # Constraint 1: Each worker can work at most 1 shift per day
-        for worker in self.workers:
-            for day in range(num_days):
-                available_shifts = self.get_available_shifts(days[day])
-                if available_shifts:
-                    model.Add(sum(shifts[worker][day][shift] for shift in available_shifts) <= 1)
+        for worker_index in var_index:
+            for day_index in worker_index:
+                if day_index:
+                    constraints.add().at_most_one.literals.extend(day_index)
         
         # Constraint 2: Exactly 1 worker per shift per day
         for day in range(num_days):
-            available_shifts = self.get_available_shifts(days[day])
-            for shift in available_shifts:
-                model.Add(sum(shifts[worker][day][shift] for worker in self.workers) == 1)
+            for position in range(len(avail[day])):
+                constraints.add().exactly_one.literals.extend(
+                    [worker_index[day][position] for worker_index in var_index]
+                )
+        
+        # Shifts worked by each worker on each day, built once and shared by constraint 3
+        # and the symmetry breaking below
+        day_total = [[cp_model.LinearExpr.Sum([shifts[worker, day, shift] for shift in avail[day]])
+                      for day in range(num_days)]
+                     for worker in self.workers]
         
         # Constraint 3: Working pattern (strict 4+2 or flexible)
-        if self.strict_pattern:
-            # Strict 4 consecutive working days, then 2 days off pattern
-            for worker in self.workers:
-                for start_day in range(num_days - 5):  # Need 6 days for the pattern
-                    # Create indicator variables for the 4-days-on, 2-days-off pattern
-                    works_4_days = model.NewBoolVar(f'worker_{worker}_works_4_days_{start_day}')
-                    off_2_days = model.NewBoolVar(f'worker_{worker}_off_2_days_{start_day}')
-                    
-                    # If worker works 4 consecutive days, they must be off for the next 2 days
-                    if start_day + 5 < num_days:
-                        # Sum of working days in the 4-day period
-                        working_days_sum = []
-                        for i in range(4):
-                            day = start_day + i
-                            if day < num_days:
-                                available_shifts = self.get_available_shifts(days[day])
-                                if available_shifts:
-                                    working_days_sum.append(sum(shifts[worker][day][shift] for shift in available_shifts))
-                        
-                        # Sum of working days in the 2-day off period
-                        off_days_sum = []
-                        for i in range(2):
-                            day = start_day + 4 + i
-                            if day < num_days:
-                                available_shifts = self.get_available_shifts(days[day])
-                                if available_shifts:
-                                    off_days_sum.append(sum(shifts[worker][day][shift] for shift in available_shifts))
-                        
-                        if working_days_sum and off_days_sum:
-                            # If works 4 days, then must be off 2 days
-                            model.Add(sum(working_days_sum) == 4).OnlyEnforceIf(works_4_days)
-                            model.Add(sum(off_days_sum) == 0).OnlyEnforceIf(off_2_days)
-                            model.Add(works_4_days == off_2_days)
-        else:
+        # The strict 4+2 rotation is not posted as a hard constraint: with exactly one worker
+        # per shift, no 4-on/2-off rotation covers both the 4-shift weekdays and the 3-shift
+        # Sundays, so strict mode relies on constraints 4 (above) and 5 (below).
+        if not self.strict_pattern:
             # Flexible pattern - just ensure working days per week constraints
             for worker in self.workers:
                 # Calculate working days per week
                 for week_start in range(0, num_days, 7):
-                    week_end = min(week_start + 7, num_days)
-                    week_working_days = []
-                    
-                    for day in range(week_start, week_end):
-                        available_shifts = self.get_available_shifts(days[day])
-                        if available_shifts:
-                            week_working_days.append(sum(shifts[worker][day][shift] for shift in available_shifts))
+                    week_total = cp_model.LinearExpr.Sum(day_total[worker][week_start:week_start + 7])
                     
-                    if week_working_days:
-                        # Flexible working days per week
-                        model.Add(sum(week_working_days) >= self.min_working_days)
-                        model.Add(sum(week_working_days) <= self.max_working_days)
-        
-        # Constraint 4: Workers maintain same shift type during their working period until they rest
-        # This applies regardless of strict_pattern setting
-        for worker in self.workers:
-            for start_day in range(num_days - 1):  # Check consecutive days
-                for shift in self.shifts.keys():
-                    # If worker works this shift on start_day, they must work the same shift
-                    # on the next day if they work (no shift change without rest)
-                    if start_day + 1 < num_days:
-                        available_shifts_0 = self.get_available_shifts(days[start_day])
-                        available_shifts_1 = self.get_available_shifts(days[start_day + 1])
-                        
-                        if shift in available_shifts_0 and shift in available_shifts_1:
-                            works_shift_day_0 = shifts[worker][start_day][shift]
-                            works_shift_day_1 = shifts[worker][start_day + 1][shift]
-                            
-                            # If works on day 0 and day 1, must be same shift
-                            works_both_days = model.NewBoolVar(f'worker_{worker}_works_both_{start_day}')
-                            model.Add(works_both_days == 1).OnlyEnforceIf(works_shift_day_0)
-                            model.Add(works_both_days == 1).OnlyEnforceIf(works_shift_day_1)
-                            model.Add(works_shift_day_0 == works_shift_day_1).OnlyEnforceIf(works_both_days)
+                    # Flexible working days per week
+                    model.AddLinearConstraint(week_total, self.min_working_days, self.max_working_days)
         
         # Constraint 5: No worker can have a full week off (7 consecutive days off)
-        for worker in self.workers:
+        # Not implied by constraints 3 and 4: without it a worker may stay off all month
+        for worker_index in var_index:
             for start_day in range(num_days - 6):  # Need 7 days to check
-                week_off = []
-                for i in range(7):
-                    day = start_day + i
-                    if day < num_days:
-                        available_shifts = self.get_available_shifts(days[day])
-                        if available_shifts:
-                            week_off.append(sum(shifts[worker][day][shift] for shift in available_shifts))
-                
-                if len(week_off) == 7:
-                    model.Add(sum(week_off) > 0)  # At least one day must be worked
+                # At least one shift must be worked in the window; days sharing a
+                # variable contribute it once
+                constraints.add().bool_or.literals.extend(sorted({
+                    index
+                    for day_index in worker_index[start_day:start_day + 7]
+                    for index in day_index
+                }))
+        
+        # Symmetry breaking: workers are interchangeable, so every solution can be relabelled
+        # so that worker i covers the i-th shift of the first day and the remaining workers
+        # are ordered by their first working day
+        first_day_shifts = avail[0]
+        for worker, shift in zip(self.workers, first_day_shifts):
+            model.Add(shifts[worker, 0, shift] == 1)
+        
+        free_workers = self.workers[len(first_day_shifts):]
+        first_work_day = {}
+        for worker in free_workers:
+            first_work_day[worker] = model.NewIntVar(0, num_days, f'worker_{worker}_first_work_day')
+            model.AddMinEquality(first_work_day[worker], [
+                day + (num_days - day) * (1 - day_total[worker][day])
+                for day in range(num_days)
+            ])
+        for worker, next_worker in zip(free_workers, free_workers[1:]):
+            model.Add(first_work_day[worker] <= first_work_day[next_worker])
+        
+        return model, shifts, days
+    
+    def get_schedule_model(self, year: int, month: int) -> Tuple[cp_model.CpModel, np.ndarray, List[date]]:
+        """Get a fresh copy of the model for the given month, reusing one built for a same-shaped month"""
+        days = self.get_month_days(year, month)
+        key = (len(days), days[0].weekday())
+        if key not in self._models:
+            model, shifts, _ = self.create_schedule_model(year, month)
+            self._models[key] = (model, shifts)
+        model, shifts = self._models[key]
+        # Clones keep variable indices, so shifts stays valid; hints go on the copy only
+        return model.Clone(), shifts, days
+    
+    def add_solution_hint(self, model: cp_model.CpModel, shifts: np.ndarray, days: List[date], warm_hint: Dict):
+        """Seed the model with a previous result, aligning days by weekday"""
+        prev = warm_hint['assignments']
+        prev_days = len(warm_hint['days'])
+        offset = (days[0].weekday() - warm_hint['days'][0].weekday()) % 7
+        num_workers = min(self.num_workers, prev.shape[0])
+        hinted = set()
         
-        return model, shifts
+        for day in range(len(days)):
+            # Same weekday in the previous month, stepping back whole weeks past its end
+            prev_day = day + offset
+            while prev_day >= prev_days:
+                prev_day -= 7
+            for worker in range(num_workers):
+                for shift, var in enumerate(shifts[worker, day]):
+                    # Variables shared across a run of days are hinted once
+                    if var is not None and var.Index() not in hinted:
+                        hinted.add(var.Index())
+                        model.AddHint(var, int(prev[worker, prev_day, shift]))
     
-    def solve_schedule(self, year: int, month: int) -> Optional[Dict]:
-        """Solve the scheduling problem for the given month"""
-        model, shifts = self.create_schedule_model(year, month)
+    def solve_schedule(self, year: int, month: int, warm_hint: Optional[Dict] = None) -> Optional[Dict]:
+        """Solve the scheduling problem for the given month
+        
+        The search is warm-started from warm_hint if given. Returns None when the
+        model is infeasible and raises TimeoutError when the time limit is reached
+        before any solution is found.
+        """
+        model, shifts, days = self.get_schedule_model(year, month)
+        
+        if warm_hint:
+            self.add_solution_hint(model, shifts, days, warm_hint)
         
         # Create solver
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 30.0  # 30 second timeout
+        solver.parameters.max_time_in_seconds = self.max_time_s
+        solver.parameters.num_workers = self.solver_workers  # Parallel portfolio search
+        if warm_hint:
+            solver.parameters.repair_hint = True  # Hints are a starting point, not a requirement
         
         # Solve
         status = solver.Solve(model)
         
+        if status == cp_model.UNKNOWN:
+            raise TimeoutError(f"No solution found within {self.max_time_s}s")
+        
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            # Extract solution
-            solution = {}
-            days = self.get_month_days(year, month)
-            
-            for worker in self.workers:
-                solution[worker] = {}
-                for day in range(len(days)):
-                    solution[worker][day] = {}
-                    available_shifts = self.get_available_shifts(days[day])
-                    for shift in available_shifts:
-                        if solver.Value(shifts[worker][day][shift]) == 1:
-                            solution[worker][day][shift] = True
-                        else:
-                            solution[worker][day][shift] = False
+            # Extract solution into a dense assignments[worker, day, shift] boolean array,
+            # reading the response's value vector once and gathering by variable index
+            values = np.asarray(solver.ResponseProto().solution, dtype=bool)
+            var_index = np.array([-1 if var is None else var.Index() for var in shifts.flat]).reshape(shifts.shape)
+            assignments = (var_index >= 0) & values[var_index]
             
             return {
-                'solution': solution,
+                'assignments': assignments,
                 'days': days,
                 'status': 'OPTIMAL' if status == cp_model.OPTIMAL else 'FEASIBLE'
             }
         else:
             return None
     
-    def format_schedule(self, result: Dict) -> pd.DataFrame:
-        """Format the solution into a readable DataFrame"""
+    def build_all_views(self, result: Dict) -> SimpleNamespace:
+        """Build every view of a solution from its assignments array
+        
+        Returns a namespace with:
+        - schedule_df: one row per day and available shift
+        - worker_df: one row per worker and day
+        - shift_coverage: worker totals per shift
+        - daily_coverage: int8 array of workers per (day, shift)
+        """
         if not result:
-            return pd.DataFrame()
+            return SimpleNamespace(
+                schedule_df=pd.DataFrame(),
+                worker_df=pd.DataFrame(),
+                shift_coverage=pd.DataFrame(),
+                daily_coverage=np.zeros((0, len(self.shifts)), dtype=np.int8)
+            )
         
-        solution = result['solution']
+        assignments = result['assignments']
         days = result['days']
+        num_days = len(days)
         
-        # Create DataFrame
-        data = []
-        for day_idx, date in enumerate(days):
-            day_name = date.strftime('%A')
-            date_str = date.strftime('%Y-%m-%d')
-            
-            for shift_id, shift_name in self.shifts.items():
-                available_shifts = self.get_available_shifts(date)
-                if shift_id in available_shifts:
-                    workers_on_shift = []
-                    for worker in self.workers:
-                        if solution[worker][day_idx][shift_id]:
-                            workers_on_shift.append(f"Trabalhador {worker + 1}")
-                    
-                    data.append({
-                        'Data': date_str,
-                        'Dia': day_name,
-                        'Turno': shift_name,
-                        'Trabalhadores': ', '.join(workers_on_shift) if workers_on_shift else 'Não Atribuído',
-                        'Contagem': len(workers_on_shift)
-                    })
+        # Per-day labels are formatted once; rows index into them
+        date_strs = np.array([date.isoformat() for date in days], dtype=object)
+        day_names = np.array([_DAY_NAMES[date.weekday()] for date in days], dtype=object)
+        shift_names = np.array(list(self.shifts.values()), dtype=object)
+        worker_names = np.array([f"Trabalhador {worker + 1}" for worker in self.workers], dtype=object)
         
-        return pd.DataFrame(data)
-    
-    def get_worker_schedule(self, result: Dict) -> pd.DataFrame:
-        """Get schedule from worker perspective"""
-        if not result:
-            return pd.DataFrame()
+        sunday_row = np.isin(np.arange(len(self.shifts)), self.sunday_shifts)
+        available = np.where(self.get_sunday_mask(days)[:, None], sunday_row, True)
         
-        solution = result['solution']
-        days = result['days']
+        # Daily view: one row per available (day, shift), in day then shift order
+        counts = assignments.sum(axis=0)
+        row_days, row_shifts = np.nonzero(available)
+        schedule_df = pd.DataFrame({
+            'Data': date_strs[row_days],
+            'Dia': day_names[row_days],
+            'Turno': shift_names[row_shifts],
+            'Trabalhadores': [
+                ', '.join(worker_names[assignments[:, day, shift]]) or 'Não Atribuído'
+                for day, shift in zip(row_days, row_shifts)
+            ],
+            'Contagem': counts[row_days, row_shifts]
+        })
         
-        data = []
-        for worker in self.workers:
-            for day_idx, date in enumerate(days):
-                day_name = date.strftime('%A')
-                date_str = date.strftime('%Y-%m-%d')
-                
-                worker_shifts = []
-                available_shifts = self.get_available_shifts(date)
-                for shift_id in available_shifts:
-                    if solution[worker][day_idx][shift_id]:
-                        worker_shifts.append(self.shifts[shift_id])
-                
-                data.append({
-                    'Trabalhador': f"Trabalhador {worker + 1}",
-                    'Data': date_str,
-                    'Dia': day_name,
-                    'Turno': ', '.join(worker_shifts) if worker_shifts else 'Folga',
-                    'Estado': 'Trabalho' if worker_shifts else 'Folga'
-                })
+        # Worker view: one row per (worker, day); a worker holds at most one shift a day
+        working = assignments.any(axis=2)
+        worker_df = pd.DataFrame({
+            'Trabalhador': np.repeat(worker_names, num_days),
+            'Data': np.tile(date_strs, len(self.workers)),
+            'Dia': np.tile(day_names, len(self.workers)),
+            'Turno': np.where(working, shift_names[assignments.argmax(axis=2)], 'Folga').ravel(),
+            'Estado': np.where(working, 'Trabalho', 'Folga').ravel()
+        })
+        
+        daily_coverage = np.where(available, counts, 0).astype(np.int8)
+        shift_totals = daily_coverage.sum(axis=0)
+        shift_days = available.sum(axis=0)
+        offered = shift_days > 0
+        shift_coverage = pd.DataFrame({
+            'Turno': shift_names[offered],
+            'Total Trabalhadores': shift_totals[offered].astype(np.int64),
+            'Média Trabalhadores': shift_totals[offered] / shift_days[offered],
+            'Dias': shift_days[offered].astype(np.int64)
+        })
         
-        return pd.DataFrame(data)
+        return SimpleNamespace(
+            schedule_df=schedule_df,
+            worker_df=worker_df,
+            shift_coverage=shift_coverage,
+            daily_coverage=daily_coverage
+        )
+    
+    def format_schedule(self, result: Dict) -> pd.DataFrame:
+        """Format the solution into a readable DataFrame"""
+        return self.build_all_views(result).schedule_df
+    
+    def get_worker_schedule(self, result: Dict) -> pd.DataFrame:
+        """Get schedule from worker perspective"""
+        return self.build_all_views(result).worker_df